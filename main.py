@@ -1,20 +1,32 @@
 # main.py
 
+import asyncio
+import csv
+import functools
+import gzip
+import hashlib
+import importlib.util
+import itertools
 import json
-import jinja2
-import math
-import sys
 import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any, Union
+from typing import Any, AsyncIterator, Deque, Dict, List, Literal, Optional, Set, Type, TypedDict, Union
 
+import jinja2
+import numpy as np
 import pandas as pd
+import pydantic_core
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel, Field, ConfigDict, field_validator
 from loguru import logger
 
 # --- Load Environment Variables ---
@@ -25,97 +37,152 @@ load_dotenv()
 # and also setup a sink for our WebSocket to stream logs to the frontend.
 
 class WebSocketSink:
+    # A client that takes longer than this to accept a batch is dropped, so it can't stall the flusher
+    SEND_TIMEOUT = 5.0
+
     def __init__(self) -> None:
-        self.connections: List[WebSocket] = []
+        self.connections: Set[WebSocket] = set()
+        # Log lines waiting for the next flush. deque append/popleft are atomic, so threadpool
+        # threads can append while the event loop drains it without a lock. Bounded like
+        # log_buffer: if flushes fall behind, the oldest lines are dropped.
+        self.pending: Deque[str] = deque(maxlen=1000)
 
     async def connect(self, websocket: WebSocket) -> None:
         await websocket.accept()
-        self.connections.append(websocket)
+        self.connections.add(websocket)
 
     def disconnect(self, websocket: WebSocket) -> None:
-        if websocket in self.connections:
-            self.connections.remove(websocket)
+        self.connections.discard(websocket)
 
     async def broadcast(self, message: str) -> None:
-        for connection in self.connections:
-            try:
-                await connection.send_text(message)
-            except Exception:
-                # If sending fails, assume connection is dead and remove it
+        # Send to every client concurrently, so one slow client doesn't delay the rest
+        connections = list(self.connections)
+        results = await asyncio.gather(
+            *(asyncio.wait_for(connection.send_text(message), self.SEND_TIMEOUT) for connection in connections),
+            return_exceptions=True,
+        )
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                # If sending fails or times out, assume connection is dead and remove it
                 self.disconnect(connection)
-    
+
     def write(self, message: str) -> None:
-        # This method is called by loguru
-        # Since loguru calls this synchronously, but we need to await send_text,
-        # we have to schedule it on the event loop.
-        # However, for simplicity in this synchronous bridge, we might need a workaround
-        # or just use a standard queue.
-        # For now, let's just print to console, and we'll handle the websocket 
-        # separately via an API endpoint that polls logs or a slightly more complex setup.
-        # EDIT: Simplest way for 'live' logs in this context: 
-        # Just use a global list for recent logs and poll, or use a proper async sink.
-        pass
+        """
+        Loguru sink. Loguru calls this synchronously, possibly from a threadpool thread, so the
+        message is only queued here; `run_flusher` sends the queued lines from the event loop.
+        """
+        # Nothing to queue if no one is listening
+        if self.connections:
+            self.pending.append(message)
+
+    async def run_flusher(self, interval: float = 0.05) -> None:
+        """
+        Sends queued log lines to every client as one JSON array per interval, rather than a
+        frame (and a send per connection) for every line. Runs until cancelled.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            batch = []
+            # Drain one line at a time: a line appended meanwhile is either taken here or left for the next flush
+            while self.pending:
+                batch.append(self.pending.popleft())
+            if batch:
+                await self.broadcast(json.dumps(batch))
 
 # We'll use a simple in-memory buffer for the logs to show in the frontend
 # for the initial load, and a websocket for live updates.
-log_buffer: List[str] = []
+# A bounded deque drops the oldest entry in O(1) once full, unlike list.pop(0).
+log_buffer: Deque[str] = deque(maxlen=1000)
 
 def memory_sink(message: str) -> None:
     log_buffer.append(message)
-    if len(log_buffer) > 1000:
-        log_buffer.pop(0)
 
 logger.remove() # Remove default handler
 logger.add(sys.stderr, level="INFO") # Add standard stderr handler
 logger.add(memory_sink, level="DEBUG", format="{time:HH:mm:ss} | {level} | {message}")
 
+# Live log stream for /ws/logs clients, in the same format as the buffer above
+websocket_sink = WebSocketSink()
+logger.add(websocket_sink.write, level="DEBUG", format="{time:HH:mm:ss} | {level} | {message}")
+
+
+# --- Graph Models ---
+# Every node and edge is built from data we have already cleaned, so they are plain dicts
+# in exactly the shape vis.js expects. The TypedDicts only exist for type checking: there is
+# no per-object validation or model dump, and the payload is serialized directly.
+
+class _NodePosition(TypedDict, total=False):
+    """Optional pre-defined layout position; only warehouse nodes have one."""
+    x: int
+    y: int
 
-# --- Pydantic Models for Type Hinting and Validation ---
 
-class Node(BaseModel):
+class Node(_NodePosition):
     """Represents a single node in the graph."""
     id: str
     label: str
     level: int
-    group: str
-    title: Union[str, None] = None  # Used for hover tooltips
-    color: Union[Dict[str, str], None] = None
-    x: Union[int, None] = None  # For pre-defined layout positioning
-    y: Union[int, None] = None  # For pre-defined layout positioning
-    # The 'fixed' property tells vis.js whether to respect the x/y coordinates
-    # We use default=False so it's not required in the constructor
-    fixed: Union[bool, Dict[str, bool]] = Field(default=False, exclude=True)
-
-    @field_validator('label')
-    @classmethod
-    def ensure_label_not_empty(cls, v: str) -> str:
-        if not v or not v.strip():
-            return "Unknown"
-        return v
-
-
-class Edge(BaseModel):
-    """Represents a connection (edge) between two nodes."""
-    model_config = ConfigDict(
-        populate_by_name=True,
-    )
-    # Using alias for 'from' and 'to' because 'from' is a reserved keyword
-    # We must construct using the field names 'source' and 'target' unless populate_by_name=True
-    source: str = Field(..., alias='from')
-    target: str = Field(..., alias='to')
+    group: int  # Index into GROUP_IDS / the payload's group list
+    title: str  # Used for hover tooltips
+
 
+# Represents a connection (edge) between two nodes.
+# vis.js calls the endpoints 'from' and 'to'; 'from' is a reserved keyword, hence the functional syntax
+Edge = TypedDict("Edge", {"from": str, "to": str})
 
-class GraphData(BaseModel):
+
+class GraphData(TypedDict):
     """Container for a set of nodes and edges."""
     nodes: List[Node]
     edges: List[Edge]
 
 
+class StatePayload(TypedDict):
+    """One graph state on the wire: indices into the payload's node table, plus its edges."""
+    nodes: List[int]
+    edges: List[Edge]
+
+
+class GraphPayload(TypedDict):
+    """
+    Everything the frontend needs. Node groups (name and styling) are sent once, indexed by
+    the integer `group` on each node, instead of being repeated on every node. Likewise most
+    nodes appear in more than one state, so each node is sent once in `nodes` and the states
+    refer to it by index.
+    """
+    groups: List[Dict[str, Any]]
+    nodes: List[Node]
+    past: StatePayload
+    current: StatePayload
+    future: StatePayload
+
+
 # --- FastAPI Application Setup ---
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Starts the websocket log flusher and renders the page at startup so the first page load
+    is served from the cache.
+    """
+    flusher = asyncio.create_task(websocket_sink.run_flusher())
+    try:
+        # Parsing the data file is blocking work, so like read_root it runs in the threadpool
+        # Requests normally arrive with the app's own root_path, so warm the cache for that
+        await run_in_threadpool(_get_cached_page, app.root_path)
+    except Exception:
+        # Don't stop the app from starting; the request handler will retry and report the error.
+        logger.exception("Could not pre-build graph data at startup.")
+    yield
+    flusher.cancel()
+    with suppress(asyncio.CancelledError):
+        await flusher
+
+
 app = FastAPI(
     title="Data Lineage Visualizer API",
     description="Serves data for the data lineage visualization tool.",
+    lifespan=lifespan,
 )
 
 # Mount static files directory
@@ -131,12 +198,38 @@ jinja_env = jinja2.Environment(
     block_start_string='[%',
     block_end_string='%]',
 )
-# Passing env to use custom delimiters.
-# type: ignore[call-arg] is needed because mypy expects 'directory' as a positional arg based on some stubs
-templates = Jinja2Templates(env=jinja_env) # type: ignore[call-arg]
+
+
+@jinja2.pass_context
+def static_url_for(context: jinja2.runtime.Context, name: str, /, **path_params: Any) -> str:
+    """
+    Request-independent `url_for` for templates. The page is rendered once and cached,
+    so this returns the route's path (e.g. /static/js/app.js) rather than a full URL,
+    prefixed with the `root_path` the page was rendered for (when served under a prefix).
+    """
+    root_path: str = context.get("root_path", "")
+    return root_path + str(app.url_path_for(name, **path_params))
+
+
+jinja_env.globals["url_for"] = static_url_for
+
+# Compiled once at import; renders then skip the loader lookup and up-to-date check
+INDEX_TEMPLATE = jinja_env.get_template("index.html")
 
 # --- Data Processing and Graph Generation Logic ---
 
+# pyarrow (the 'speedups' extra) has a multithreaded CSV parser that is much faster than pandas' C engine.
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+# orjson (also in 'speedups') serializes the graph payload about twice as fast as pydantic_core.
+HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+# brotli (also in 'speedups') compresses the page noticeably smaller than gzip for browsers that accept it.
+HAS_BROTLI = importlib.util.find_spec("brotli") is not None
+# calamine parses xlsx in Rust, many times faster than openpyxl's pure-Python XML parsing.
+# openpyxl is not a dependency: it is only used where it happens to be installed and calamine isn't.
+EXCEL_ENGINE: Literal["calamine", "openpyxl"] = (
+    "calamine" if importlib.util.find_spec("python_calamine") is not None else "openpyxl"
+)
+
 NODE_GROUPS = {
     "feed": {"color": {"background": "#e0f2fe", "border": "#38bdf8"}},
     "warehouse": {"color": {"background": "#ffedd5", "border": "#fb923c"}},
@@ -145,13 +238,18 @@ NODE_GROUPS = {
     "logical_dw": {"color": {"background": "#fee2e2", "border": "#f87171"}},
 }
 
+# On the wire each node carries a small integer group id instead of the group name;
+# the payload lists the groups once, in id order, for the frontend to resolve them.
+GROUP_IDS = {name: group_id for group_id, name in enumerate(NODE_GROUPS)}
+PAYLOAD_GROUPS = [{"name": name, **style} for name, style in NODE_GROUPS.items()]
 
-def get_graph_data() -> Dict[str, GraphData]:
+
+def resolve_data_path() -> Path:
     """
-    Reads data, generates unique IDs for all nodes, and builds the graph data.
+    Resolves the data file to load: DATA_FILE_PATH if set, then the default Excel file, then the CSV fallback.
     """
-    logger.info("Starting graph data generation...")
-    
+    default_excel_path = Path(__file__).parent / "data" / "Warehouse Feeds Matrix.xlsx"
+
     # Resolve Data Path from Environment Variable or Defaults
     env_data_path = os.getenv("DATA_FILE_PATH")
     if env_data_path:
@@ -159,21 +257,184 @@ def get_graph_data() -> Dict[str, GraphData]:
         possible_path = Path(env_data_path)
         if possible_path.exists():
             excel_path = possible_path
-            logger.info(f"Using data file from DATA_FILE_PATH: {excel_path}")
+            logger.debug(f"Using data file from DATA_FILE_PATH: {excel_path}")
         else:
              # Try relative to the app directory if not found directly
             possible_path = Path(__file__).parent / env_data_path
             if possible_path.exists():
                 excel_path = possible_path
-                logger.info(f"Using data file from DATA_FILE_PATH (relative): {excel_path}")
+                logger.debug(f"Using data file from DATA_FILE_PATH (relative): {excel_path}")
             else:
                 logger.warning(f"DATA_FILE_PATH set to '{env_data_path}' but file not found. Falling back to defaults.")
-                excel_path = Path(__file__).parent / "data" / "Warehouse Feeds Matrix.xlsx"
+                excel_path = default_excel_path
     else:
-        excel_path = Path(__file__).parent / "data" / "Warehouse Feeds Matrix.xlsx"
+        excel_path = default_excel_path
 
     csv_path = Path(__file__).parent / "data" / "warehouse_feeds.csv"
 
+    if excel_path.exists():
+        return excel_path
+    if csv_path.exists():
+        return csv_path
+
+    logger.error(f"No data file found. Looked for {excel_path} and {csv_path}")
+    raise FileNotFoundError(f"No data file found. Looked for {excel_path} and {csv_path}")
+
+
+# The strings pandas reads as missing by default (its `na_values`). Both file formats treat
+# cells holding one of these as blank, like pd.read_csv and pd.read_excel do.
+NA_VALUES = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+
+
+def read_csv_as_text(data_path: Path) -> pd.DataFrame:
+    """
+    Reads a CSV with every cell as text and missing values (see NA_VALUES) as "". Cells are
+    compared as strings, so type inference would be wasted work (and would turn IDs like '001' into 1).
+    """
+    if HAS_PYARROW:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pacsv
+
+        # pyarrow has no "read everything as text" switch, so name the columns from the header row
+        with open(data_path, newline="", encoding="utf-8-sig") as f:
+            header = next(csv.reader(f), [])
+        convert_options = pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            null_values=list(NA_VALUES),
+            strings_can_be_null=True,
+        )
+
+        try:
+            # Parse straight from a memory map rather than through buffered reads
+            with pa.memory_map(str(data_path), "r") as source:
+                table = pacsv.read_csv(source, convert_options=convert_options)
+        except pa.ArrowInvalid as e:
+            # pyarrow rejects ragged rows that pandas pads with blanks, so let pandas read those files
+            logger.warning(f"pyarrow could not parse {data_path.name} ({e}); falling back to pandas")
+        else:
+            # Name blank headers the way pandas does. pandas also renames duplicates ('A', 'A.1'),
+            # so files with repeated headers are left to it.
+            names = [name or f"Unnamed: {i}" for i, name in enumerate(table.column_names)]
+            if len(set(names)) == len(names):
+                # Blank the missing cells in Arrow, before the conversion, rather than copying the frame after it
+                columns = [pc.fill_null(column, "") for column in table.columns]
+                df: pd.DataFrame = pa.Table.from_arrays(columns, names=names).to_pandas()
+                return df
+            logger.debug(f"{data_path.name} has duplicate column headers; reading it with pandas")
+
+    df = pd.read_csv(data_path, dtype=str).fillna("")
+    return df
+
+
+def read_excel_read_only(data_path: Path, sheet_name: Union[str, int]) -> pd.DataFrame:
+    """
+    Streams a worksheet with openpyxl in read-only mode and builds the DataFrame from raw
+    cell values, skipping pandas' per-cell conversion layer. Used when calamine is missing.
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(data_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        worksheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+        rows = [list(row) for row in worksheet.iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+    # Read-only sheets report the full styled range, so trim the trailing blank rows and
+    # columns that pandas (and calamine) would have dropped
+    while rows and all(value is None for value in rows[-1]):
+        rows.pop()
+    width = max((len(row) for row in rows), default=0)
+    while width and all(len(row) < width or row[width - 1] is None for row in rows):
+        width -= 1
+    rows = [row[:width] + [None] * (width - len(row)) for row in rows] or [[]]
+
+    # Name any remaining blank headers the way pandas does
+    header = [f"Unnamed: {i}" if name is None else name for i, name in enumerate(rows[0])]
+    if len(set(header)) != len(header):
+        # pandas renames duplicates ('A', 'A.1'); let the caller fall back to it
+        raise ValueError("duplicate column headers")
+
+    # pandas would also have read the NA strings in text cells as missing
+    data = [[None if value in NA_VALUES else value for value in row] for row in rows[1:]]
+    df: pd.DataFrame = pd.DataFrame(data, columns=header)
+    return df
+
+
+# Parsed Excel sheets are cached here as Parquet (gitignored). CSV is not cached: the pyarrow
+# CSV reader is already faster than reading the Parquet file back.
+PARQUET_CACHE_DIR = Path(__file__).parent / ".cache" / "parquet"
+_PARQUET_KEY_FIELD = b"source_key"
+
+
+def _parquet_cache_path(data_path: Path) -> Path:
+    """Returns the cache file for a source file, named from its full path so sources never collide."""
+    digest = hashlib.sha256(str(data_path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return PARQUET_CACHE_DIR / f"{data_path.stem}-{digest}.parquet"
+
+
+def _parquet_cache_key(data_path: Path, sheet_name: Union[str, int]) -> bytes:
+    stat = data_path.stat()
+    key = {"source": str(data_path.resolve()), "sheet": sheet_name, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    return json.dumps(key, sort_keys=True).encode("utf-8")
+
+
+def read_parquet_cache(data_path: Path, cache_key: bytes) -> Optional[pd.DataFrame]:
+    """
+    Returns the cached DataFrame for the source file, or None if there is no cache or the
+    key stored in the file's metadata no longer matches the source file's mtime and size.
+    """
+    import pyarrow.parquet as pq
+
+    cache_path = _parquet_cache_path(data_path)
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+        if metadata.get(_PARQUET_KEY_FIELD) != cache_key:
+            return None
+        df: pd.DataFrame = pq.read_table(cache_path).to_pandas()
+        return df
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable Parquet cache {cache_path}: {e}")
+        return None
+
+
+def write_parquet_cache(data_path: Path, cache_key: bytes, df: pd.DataFrame) -> None:
+    """
+    Saves the parsed DataFrame so later boots can skip parsing the source file.
+    Failures (read-only directory, unusual column names) are logged and otherwise ignored.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    cache_path = _parquet_cache_path(data_path)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        # Excel cells can mix numbers and text in one column, which Parquet can't store.
+        # The graph code compares every cell as a string anyway.
+        table = pa.Table.from_pandas(df.astype(str), preserve_index=False)
+        # The key travels inside the file, so the data and its key are replaced together
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), _PARQUET_KEY_FIELD: cache_key})
+        PARQUET_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write under a per-writer name and rename into place: concurrent writers (startup
+        # warm-up and request threads) never interleave, and readers never see a partial file
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, cache_path)
+        logger.debug(f"Wrote Parquet cache: {cache_path}")
+    except Exception as e:
+        tmp_path.unlink(missing_ok=True)
+        logger.warning(f"Could not write Parquet cache {cache_path}: {e}")
+
+
+def load_data_frame(data_path: Path) -> pd.DataFrame:
+    """
+    Reads the data file (CSV or Excel) into a DataFrame with NaNs replaced by empty strings.
+    """
     # Resolve Sheet Name from Environment Variable
     sheet_name: Union[str, int] = os.getenv("DATA_SHEET_NAME", 0)
     # If it looks like a number, treat it as an index
@@ -181,187 +442,336 @@ def get_graph_data() -> Dict[str, GraphData]:
         sheet_name = int(sheet_name)
 
     # Load Data
-    if excel_path.exists():
+    df: pd.DataFrame
+    if data_path.suffix.lower() == ".csv":
+        logger.info(f"Reading CSV file: {data_path} (Engine: {'pyarrow' if HAS_PYARROW else 'c'})")
+        df = read_csv_as_text(data_path)
+    else:
+        # Prefer the Parquet cache from a previous parse of the same sheet. The key is taken
+        # before parsing, so a file edited mid-parse is re-read next time.
+        cache_key = _parquet_cache_key(data_path, sheet_name) if HAS_PYARROW else None
+        cached_df = read_parquet_cache(data_path, cache_key) if cache_key is not None else None
+        if cached_df is not None:
+            logger.info(f"Reading cached data for {data_path.name} from Parquet")
+            return cached_df
+
         try:
-            logger.info(f"Reading Excel file: {excel_path} (Sheet: {sheet_name})")
-            df = pd.read_excel(excel_path, sheet_name=sheet_name, engine='openpyxl')
+            logger.info(f"Reading Excel file: {data_path} (Sheet: {sheet_name}, Engine: {EXCEL_ENGINE})")
+            if EXCEL_ENGINE == "openpyxl":
+                try:
+                    df = read_excel_read_only(data_path, sheet_name)
+                except Exception as e:
+                    logger.warning(f"Read-only openpyxl load failed ({e}); retrying with pandas.read_excel")
+                    df = pd.read_excel(data_path, sheet_name=sheet_name, engine=EXCEL_ENGINE)
+            else:
+                df = pd.read_excel(data_path, sheet_name=sheet_name, engine=EXCEL_ENGINE)
         except Exception as e:
-            logger.error(f"Could not read Excel file at {excel_path} (Sheet: {sheet_name}). Error: {e}")
-            raise FileNotFoundError(f"Could not read Excel file at {excel_path}. Error: {e}")
+            logger.error(f"Could not read Excel file at {data_path} (Sheet: {sheet_name}). Error: {e}")
+            raise FileNotFoundError(f"Could not read Excel file at {data_path}. Error: {e}")
 
-    elif csv_path.exists():
-        logger.info(f"Reading CSV file: {csv_path}")
-        df = pd.read_csv(csv_path)
-    else:
-        logger.error(f"No data file found. Looked for {excel_path} and {csv_path}")
-        raise FileNotFoundError(f"No data file found. Looked for {excel_path} and {csv_path}")
+        # Data Cleaning: Replace all NaNs with empty strings immediately.
+        # The CSV reader already returns blanks as "", so only Excel needs this full-frame copy.
+        df = df.fillna("")
+        if cache_key is not None:
+            write_parquet_cache(data_path, cache_key, df)
+
+    logger.debug(f"Dataframe shape after loading: {df.shape}")
+    return df
 
-    # Data Cleaning: Replace all NaNs with empty strings immediately
-    df = df.fillna("")
-    logger.debug(f"Dataframe shape after cleaning: {df.shape}")
+
+def get_graph_data(df: pd.DataFrame) -> Dict[str, GraphData]:
+    """
+    Generates unique IDs for all nodes and builds the graph data from the loaded DataFrame.
+    """
+    logger.info("Starting graph data generation...")
 
     feed_name_col = df.columns[0]
     feed_full_name_col = df.columns[-1]
     dw_cols = df.columns[1:-1].tolist()
-    logger.debug(f"Columns identified - Feed: {feed_name_col}, Full Name: {feed_full_name_col}, Warehouses: {len(dw_cols)}")
+    # Stable warehouse keys (spaces replaced), computed once and reused for nodes and edges
+    dw_id_map = {dw: dw.replace(" ", "_") for dw in dw_cols}
+    logger.debug(
+        f"Columns identified - Feed: {feed_name_col}, Full Name: {feed_full_name_col}, Warehouses: {len(dw_cols)}"
+    )
 
     node_counter = 0
-    id_map = {}  # Maps a stable identifier to the new, unique node ID
 
     # --- Create Master lists of nodes with unique IDs ---
-    feed_nodes = []
-    for index, row in df.iterrows():
-        # Use the dataframe index to create a temporary, stable key for the map
-        feed_name = str(row[feed_name_col]).strip()
+    # Clean the two feed columns as whole Series rather than cell by cell
+    feed_names = df[feed_name_col].astype(str).str.strip()
+    full_feed_names = df[feed_full_name_col].astype(str).str.strip()
+    # Fallback logic for title: use full name if available, else use feed name
+    display_titles = full_feed_names.where(full_feed_names != "", feed_names)
+    num_feeds = int((feed_names != "").sum())  # Empty rows are skipped
+
+    # Feed nodes are numbered first, so the warehouse node IDs are known before any feed is built
+    wh_ids = [f"{num_feeds + i}-{dw_id_map[dw_name]}" for i, dw_name in enumerate(dw_cols)]
+
+    # The feed x warehouse connectivity is a dense matrix: normalise it once as a numpy array
+    # instead of cleaning each cell in Python.
+    raw_matrix = df[dw_cols].to_numpy(dtype=str)
+    matrix = np.char.upper(np.char.strip(raw_matrix))
+
+    # Unexpected values are treated as not connected. Warn once per column with a few examples,
+    # so a badly formatted column can't flood the log buffer with one line per cell.
+    unexpected = ~np.isin(matrix, ["Y", "N", "0", ""])
+    for c in np.flatnonzero(unexpected.any(axis=0)).tolist():
+        bad_rows = np.flatnonzero(unexpected[:, c]).tolist()
+        examples = ", ".join(f"'{raw_matrix[r, c].strip()}' (feed '{feed_names.iat[r]}')" for r in bad_rows[:5])
+        more = f" and {len(bad_rows) - 5} more" if len(bad_rows) > 5 else ""
+        logger.warning(
+            f"{len(bad_rows)} unexpected value(s) in column '{dw_cols[c]}': {examples}{more}. "
+            "Expected Y/N/0/Blank. Treating as False."
+        )
+    # Plain nested lists: itertools.compress over a list row is cheaper than numpy calls per row
+    connected = (matrix == "Y").tolist()
+
+    # A single pass over the rows builds each feed node together with its 'Past' edges,
+    # in the same row-major order as before.
+    feed_group = GROUP_IDS["feed"]
+    feed_nodes: List[Node] = []
+    past_edges: List[Edge] = []
+    for feed_name, display_title, connected_row in zip(feed_names.to_numpy(), display_titles.to_numpy(), connected):
         if not feed_name:
-            continue # Skip empty rows
-
-        stable_feed_key = f"feed_{index}"
-        new_id = f"{node_counter}-{feed_name}"
-        id_map[stable_feed_key] = new_id
-
-        # Fallback logic for title: use full name if available, else use feed name
-        full_feed_name = str(row[feed_full_name_col]).strip()
-        display_title = full_feed_name if full_feed_name else feed_name
-
+            continue  # Skip the row and any edges it would have had
+        feed_id = f"{node_counter}-{feed_name}"
+        node_counter += 1
         feed_nodes.append(
-            Node(id=new_id, label=feed_name, level=0, group="feed",
-                 title=f"Feed: {display_title}", color=NODE_GROUPS["feed"]["color"])
+            {"id": feed_id, "label": feed_name, "level": 0, "group": feed_group, "title": f"Feed: {display_title}"}
         )
-        node_counter += 1
-    
+        past_edges.extend({"from": feed_id, "to": wh_id} for wh_id in itertools.compress(wh_ids, connected_row))
+
     logger.info(f"Processed {len(feed_nodes)} feed nodes.")
 
-    warehouse_nodes = []
     # Arrange warehouses in a circle to give the physics engine a better start and reduce initial overlap.
     num_warehouses = len(dw_cols)
     radius = num_warehouses * 50  # Make radius dependent on number of nodes to spread them out
-    for i, dw_name in enumerate(dw_cols):
-        stable_wh_key = dw_name.replace(" ", "_")
-        new_id = f"{node_counter}-{stable_wh_key}"
-        id_map[stable_wh_key] = new_id
-
-        # Calculate circular position
-        angle = (2 * math.pi / num_warehouses) * i if num_warehouses > 0 else 0
-        x_pos = int(radius * math.cos(angle))
-        y_pos = int(radius * math.sin(angle))
-
-        warehouse_nodes.append(
-            Node(
-                id=new_id,
-                label=dw_name,
-                level=1,
-                group="warehouse",
-                title=f"Legacy Warehouse: {dw_name}",
-                color=NODE_GROUPS["warehouse"]["color"],
-                x=x_pos,
-                y=y_pos,
-                fixed=False  # Let physics engine move them from this starting position
-            )
-        )
-        node_counter += 1
-    
+    # Compute every position in one vectorised call rather than two trig calls per warehouse
+    angles = np.arange(num_warehouses) * (2 * np.pi / max(num_warehouses, 1))
+    x_positions = (radius * np.cos(angles)).astype(int).tolist()
+    y_positions = (radius * np.sin(angles)).astype(int).tolist()
+    warehouse_group = GROUP_IDS["warehouse"]
+    warehouse_nodes: List[Node] = [
+        {"id": new_id, "label": dw_name, "level": 1, "group": warehouse_group,
+         "title": f"Legacy Warehouse: {dw_name}", "x": x_pos, "y": y_pos}
+        for new_id, dw_name, x_pos, y_pos in zip(wh_ids, dw_cols, x_positions, y_positions)
+    ]
+    node_counter += len(warehouse_nodes)
+
     logger.info(f"Processed {len(warehouse_nodes)} warehouse nodes.")
 
     # Generate unique IDs for static nodes
-    new_dl_id = f"{node_counter}-dl"
-    id_map["dl"] = new_dl_id
-    data_lake_node = Node(id=new_dl_id, label="Data Lake", level=1, group="datalake", title="Central Data Lake", color=NODE_GROUPS["datalake"]["color"])
+    # Kept as locals: the edge builders below use them for every feed
+    dl_id = f"{node_counter}-dl"
+    data_lake_node: Node = {
+        "id": dl_id, "label": "Data Lake", "level": 1, "group": GROUP_IDS["datalake"], "title": "Central Data Lake"
+    }
     node_counter += 1
 
-    new_dv_id = f"{node_counter}-dv"
-    id_map["dv"] = new_dv_id
-    dv_node = Node(id=new_dv_id, label="Data Virtualisation", level=2, group="virtualisation", title="Data Virtualisation Layer", color=NODE_GROUPS["virtualisation"]["color"])
+    dv_id = f"{node_counter}-dv"
+    dv_node: Node = {
+        "id": dv_id, "label": "Data Virtualisation", "level": 2, "group": GROUP_IDS["virtualisation"],
+        "title": "Data Virtualisation Layer",
+    }
     node_counter += 1
 
-    logical_dws = []
+    logical_dws: List[Node] = []
     for i, ldw_name in enumerate(["Sales", "Marketing", "Finance"]):
-        stable_ldw_key = f"ldw{i+1}"
-        new_id = f"{node_counter}-{stable_ldw_key}"
-        id_map[stable_ldw_key] = new_id
+        new_id = f"{node_counter}-ldw{i+1}"
         logical_dws.append(
-            Node(id=new_id, label=f"LDW: {ldw_name}", level=3, group="logical_dw", title=f"Logical DW for {ldw_name}", color=NODE_GROUPS["logical_dw"]["color"])
+            {"id": new_id, "label": f"LDW: {ldw_name}", "level": 3, "group": GROUP_IDS["logical_dw"],
+             "title": f"Logical DW for {ldw_name}"}
         )
         node_counter += 1
 
     # --- Build State 1: Past ---
     past_nodes = feed_nodes + warehouse_nodes
-    past_edges = []
-    for index, row in df.iterrows():
-        stable_feed_key = f"feed_{index}"
-        if stable_feed_key not in id_map: # Skip if feed was skipped
-            continue
-            
-        source_id = id_map[stable_feed_key]
-        for dw_name in dw_cols:
-            raw_val = str(row[dw_name]).strip()
-            val = raw_val.upper()
-            
-            is_connected = False
-            if val == 'Y':
-                is_connected = True
-            elif val in ('N', '0', ''):
-                is_connected = False
-            else:
-                # Unexpected value - log warning and default to False
-                logger.warning(
-                    f"Unexpected value '{raw_val}' in column '{dw_name}' for feed '{feed_name}'. "
-                    "Expected Y/N/0/Blank. Treating as False."
-                )
-                is_connected = False
-
-            if is_connected:
-                stable_wh_key = dw_name.replace(" ", "_")
-                if stable_wh_key in id_map:
-                    target_id = id_map[stable_wh_key]
-                    past_edges.append(Edge(source=source_id, target=target_id))
-    
+
     logger.info(f"Generated {len(past_edges)} edges for 'Past' state.")
     past_graph = GraphData(nodes=past_nodes, edges=past_edges)
 
     # --- Build State 2: Current ---
     current_nodes = feed_nodes + warehouse_nodes + [dv_node] + logical_dws
-    current_edges = past_edges.copy()
-    warehouses_to_virtualise_keys = [dw.replace(" ", "_") for dw in dw_cols[:4]]
-    current_edges.extend([Edge(source=id_map[wh_key], target=id_map["dv"]) for wh_key in warehouses_to_virtualise_keys if wh_key in id_map])
-    current_edges.extend([Edge(source=id_map["dv"], target=ldw.id) for ldw in logical_dws])
+    # The first four warehouses are virtualised. Every warehouse column has a node, so no membership check is needed.
+    virtualisation_edges: List[Edge] = [{"from": wh_id, "to": dv_id} for wh_id in wh_ids[:4]]
+    virtualisation_edges += [{"from": dv_id, "to": ldw["id"]} for ldw in logical_dws]
+    # Past edges are never mutated, so build the combined list in a single allocation
+    current_edges = past_edges + virtualisation_edges
     current_graph = GraphData(nodes=current_nodes, edges=current_edges)
 
     # --- Build State 3: Future ---
     future_nodes = feed_nodes + [data_lake_node, dv_node] + logical_dws
-    future_edges = [Edge(source=feed.id, target=id_map["dl"]) for feed in feed_nodes]
-    future_edges.append(Edge(source=id_map["dl"], target=id_map["dv"]))
-    future_edges.extend([Edge(source=id_map["dv"], target=ldw.id) for ldw in logical_dws])
+    future_edges: List[Edge] = [{"from": feed["id"], "to": dl_id} for feed in feed_nodes]
+    future_edges.append({"from": dl_id, "to": dv_id})
+    future_edges.extend([{"from": dv_id, "to": ldw["id"]} for ldw in logical_dws])
     future_graph = GraphData(nodes=future_nodes, edges=future_edges)
 
     logger.info("Graph generation complete.")
     return {"past": past_graph, "current": current_graph, "future": future_graph}
 
 
+# --- Page Cache ---
+# The data file only changes when someone edits it, so the page is rendered once
+# and reused until the file's modification time or size changes.
+
+def build_payload(all_graphs: Dict[str, GraphData]) -> GraphPayload:
+    """Packs the three graph states into the wire format, with each node listed only once."""
+    node_table: List[Node] = []
+    node_index: Dict[str, int] = {}
+    states: Dict[str, StatePayload] = {}
+    for state, graph in all_graphs.items():
+        indices = []
+        for node in graph["nodes"]:
+            index = node_index.get(node["id"])
+            if index is None:
+                index = node_index[node["id"]] = len(node_table)
+                node_table.append(node)
+            indices.append(index)
+        states[state] = StatePayload(nodes=indices, edges=graph["edges"])
+
+    return GraphPayload(
+        groups=PAYLOAD_GROUPS, nodes=node_table, past=states["past"], current=states["current"], future=states["future"]
+    )
+
+
+def _build_graph_json(data_path: Path) -> str:
+    """Loads the data file, builds the graph data and serializes it to JSON."""
+    payload = build_payload(get_graph_data(load_data_frame(data_path)))
+    if HAS_ORJSON:
+        import orjson
+
+        return orjson.dumps(payload).decode("utf-8")
+    return pydantic_core.to_json(payload).decode("utf-8")
+
+
+@dataclass(frozen=True)
+class RenderedPage:
+    """The rendered index page, plus copies compressed once up front for clients that accept them."""
+    html: bytes
+    html_gzip: bytes
+    # Weak, because the same tag covers the plain and every encoded body
+    etag: str
+    html_br: Optional[bytes] = None  # Only when the brotli module is installed
+
+
+@functools.lru_cache(maxsize=1)
+def _render_index(data_path: Path, mtime_ns: int, size: int, root_path: str) -> RenderedPage:
+    """
+    Renders index.html with the graph data embedded. `mtime_ns` and `size` are only part of the
+    cache key; `root_path` is the ASGI path prefix the app is served under, used for asset URLs.
+    """
+    html = INDEX_TEMPLATE.render(graph_data=_build_graph_json(data_path), root_path=root_path).encode("utf-8")
+    # Compress at the highest level: it is paid once per data file change, not per request
+    html_br = None
+    if HAS_BROTLI:
+        import brotli
+
+        html_br = brotli.compress(html, quality=11, mode=brotli.MODE_TEXT)
+    return RenderedPage(
+        html=html,
+        html_gzip=gzip.compress(html, compresslevel=9),
+        etag=f'W/"{hashlib.sha256(html).hexdigest()[:16]}"',
+        html_br=html_br,
+    )
+
+
+# Requests only look at the data file this often (in seconds). In between, the page is
+# served straight from memory, without resolving the data path or touching the filesystem.
+DATA_CHECK_INTERVAL = float(os.getenv("DATA_CHECK_INTERVAL", "1"))
+_last_page: Optional[RenderedPage] = None
+_last_root_path = ""
+_last_checked = float("-inf")
+# Serializes the check-and-render below, so a burst of requests after the interval (or at a
+# cold start) renders the page once instead of once per threadpool thread
+_page_lock = threading.Lock()
+
+
+def _get_cached_page(root_path: str) -> RenderedPage:
+    """Returns the rendered page, re-rendering it only if the data file (or `root_path`) has changed."""
+    global _last_page, _last_root_path, _last_checked
+    now = time.monotonic()
+    if _last_page is not None and root_path == _last_root_path and now - _last_checked < DATA_CHECK_INTERVAL:
+        return _last_page
+
+    with _page_lock:
+        # Another thread may have checked (and rendered) while this one waited for the lock
+        now = time.monotonic()
+        if _last_page is not None and root_path == _last_root_path and now - _last_checked < DATA_CHECK_INTERVAL:
+            return _last_page
+
+        data_path = resolve_data_path()
+        # Nanosecond mtime plus size catches rewrites that land within the same second (or on coarse-mtime filesystems)
+        stat = data_path.stat()
+        page = _render_index(data_path, stat.st_mtime_ns, stat.st_size, root_path)
+        _last_page, _last_root_path, _last_checked = page, root_path, now
+        return page
+
+
+def _accepted_encodings(accept_encoding: str) -> Set[str]:
+    """Parses an Accept-Encoding header into the set of codings the client allows (q > 0)."""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                if float(value) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding.strip():
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag, as used for 304 responses."""
+    opaque_tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque_tag:
+            return True
+    return False
+
+
 # --- API Endpoint ---
 
+# Plain `def` so FastAPI runs this in its threadpool: a cache miss re-reads and parses
+# the data file, which would otherwise block the event loop (and the log websocket).
 @app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request) -> Any:
-    """Main endpoint that renders the HTML page with the graph data."""
+def read_root(request: Request) -> Any:
+    """Main endpoint that serves the HTML page with the graph data."""
     try:
-        all_graphs = get_graph_data()
-        graph_data_dict = {k: v.model_dump(by_alias=True, exclude_none=True) for k, v in all_graphs.items()}
-        graph_data_json = json.dumps(graph_data_dict)
-        return templates.TemplateResponse(
-            "index.html",
-            {"request": request, "graph_data": graph_data_json}
-        )
+        # Asset URLs must carry the prefix the app is mounted under (uvicorn --root-path or a proxy)
+        page = _get_cached_page(request.scope.get("root_path", ""))
+        # no-cache: browsers may keep the page but must revalidate, which costs a 304 until the data changes
+        headers = {"ETag": page.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if _etag_matches(request.headers.get("if-none-match", ""), page.etag):
+            return Response(status_code=304, headers=headers)
+        accepted_encodings = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        # Prefer Brotli: it is smaller than gzip and costs nothing extra here, since both are precompressed
+        if page.html_br is not None and "br" in accepted_encodings:
+            headers["Content-Encoding"] = "br"
+            return HTMLResponse(content=page.html_br, headers=headers)
+        if "gzip" in accepted_encodings:
+            headers["Content-Encoding"] = "gzip"
+            return HTMLResponse(content=page.html_gzip, headers=headers)
+        return HTMLResponse(content=page.html, headers=headers)
     except Exception as e:
         logger.exception("An unexpected error occurred during request handling.")
         return HTMLResponse(content=f"<h1>An unexpected error occurred</h1><pre>{e}</pre>", status_code=500)
 
-@app.get("/logs")
-async def get_logs() -> Dict[str, List[str]]:
+# Returned directly so the log list skips FastAPI's jsonable_encoder pass and stdlib json
+LogsResponse: Type[JSONResponse] = ORJSONResponse if HAS_ORJSON else JSONResponse
+
+
+@app.get("/logs", response_class=LogsResponse)
+async def get_logs() -> Response:
     """Returns the recent logs."""
-    return {"logs": log_buffer}
+    return LogsResponse({"logs": list(log_buffer)})
 
 # Simple websocket for logs (optional expansion)
-websocket_sink = WebSocketSink()
+# Each message is a JSON array of log lines, batched by WebSocketSink.run_flusher
 @app.websocket("/ws/logs")
 async def websocket_endpoint(websocket: WebSocket) -> None:
     await websocket_sink.connect(websocket)
@@ -5,7 +5,6 @@
  * @property {string} group
  * @property {number} level
  * @property {string} [title]
- * @property {Object} [color]
  * @property {Object} [font]
  * @property {number} [x]
  * @property {number} [y]
@@ -31,7 +30,17 @@
  */
 
 /**
- * @typedef {Object.<string, GraphStateData>} FullGraphData
+ * @typedef {Object} NodeGroup
+ * @property {Object} color
+ */
+
+/**
+ * The three graph states, plus the shared node group styles keyed by group name.
+ * @typedef {Object} FullGraphData
+ * @property {GraphStateData} past
+ * @property {GraphStateData} current
+ * @property {GraphStateData} future
+ * @property {Object.<string, NodeGroup>} groups
  */
 
 /**
@@ -74,11 +83,50 @@
 
 // static/js/app.js - Optimized for large graphs (500+ nodes) with Type Checking via JSDoc
 
+/**
+ * Expands the compact payload sent by the backend. Each node is sent once in the `nodes`
+ * table and every state lists its nodes by index into it; states share the node objects
+ * (drawGraph deep-copies before modifying). Nodes carry an integer group id that indexes
+ * the `groups` list (sent once); resolve it to the group name used for styling, layout and
+ * the table, and key the group styles by name for the vis.js `groups` option.
+ * @param {any} payload
+ * @returns {FullGraphData}
+ */
+function decodeGraphData(payload) {
+    const groupNames = payload.groups.map(group => group.name);
+    /** @type {Object.<string, NodeGroup>} */
+    const groups = {};
+    payload.groups.forEach(({ name, ...style }) => {
+        groups[name] = style;
+    });
+
+    /** @type {GraphNode[]} */
+    const nodes = payload.nodes;
+    nodes.forEach(node => {
+        node.group = groupNames[node.group];
+    });
+
+    /**
+     * @param {string} state
+     * @returns {GraphStateData}
+     */
+    const decodeState = state => ({
+        nodes: payload[state].nodes.map(index => nodes[index]),
+        edges: payload[state].edges
+    });
+    return {
+        past: decodeState('past'),
+        current: decodeState('current'),
+        future: decodeState('future'),
+        groups
+    };
+}
+
 const App = {
     data() {
         return {
             /** @type {FullGraphData} */
-            graphData: window.graphData,
+            graphData: decodeGraphData(window.graphData),
             /** @type {any} */
             network: null,
             selectedState: 'past',
@@ -300,7 +348,9 @@ const App = {
                 },
                 edges: {
                     smooth: false // Disable smooth edges globally for performance
-                }
+                },
+                // Node colours are sent once per group rather than on every node
+                groups: this.graphData.groups
             };
 
             switch (this.selectedLayout) {
@@ -355,9 +405,8 @@ const App = {
                 borderWidth: 1,
                 shadow: false,
                 // Ensure labels are strings to prevent crashing
-                label: String(node.label || ''),
-                // Keep original colors but ensure they're optimized
-                color: node.color || { background: '#97C2FC', border: '#2B7CE9' }
+                label: String(node.label || '')
+                // Colours come from the network's `groups` option
             }));
         },
 
@@ -650,7 +699,6 @@ const App = {
         applyHighlight(selectedIds) {
             if (!this.network || !this.graphData[this.selectedState]) return;
 
-            const originalNodes = this.graphData[this.selectedState].nodes;
             const nodesToUpdate = [];
             const edgesToUpdate = [];
 
@@ -668,13 +716,14 @@ const App = {
             });
 
             allNodes.forEach(node => {
-                const originalNode = originalNodes.find(n => n.id === node.id);
+                // nodeIdMap is built once per state, so this is a lookup rather than a scan of every node
+                const originalNode = this.nodeIdMap[node.id];
                 if (!originalNode) return;
 
                 if (nodesToHighlight.has(node.id)) {
                     nodesToUpdate.push({
                         id: node.id,
-                        color: originalNode.color,
+                        color: this.graphData.groups[originalNode.group]?.color,
                         opacity: 1,
                         // @ts-ignore
                         font: { color: '#343434' }